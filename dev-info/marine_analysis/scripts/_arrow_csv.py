@@ -0,0 +1,32 @@
+try:
+    import pyarrow as pa
+    from pyarrow import compute as pc
+    from pyarrow import csv as pac
+except ImportError:  # pyarrow is optional, callers fall back to pandas
+    pa = pc = pac = None
+
+
+# pandas' default NA strings for read_csv, so that the pyarrow readers treat
+# the same cells as missing. Spelled out because pandas only exposes them
+# through a private module.
+NA_VALUES = [
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+]
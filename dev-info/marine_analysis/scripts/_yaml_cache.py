@@ -0,0 +1,34 @@
+import copy
+from collections import OrderedDict
+from pathlib import Path
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+
+_CACHE_MAX_ENTRIES = 100
+_cache: "OrderedDict[tuple[str, int, int], dict]" = OrderedDict()
+
+
+def load_yaml(path: Path) -> dict:
+    path = Path(path)
+    st = path.stat()
+    key = (str(path.resolve()), st.st_mtime_ns, st.st_size)
+    cached = _cache.get(key)
+    if cached is not None:
+        _cache.move_to_end(key)
+        return copy.deepcopy(cached)
+
+    with path.open("rb") as f:
+        data = yaml.load(f, Loader=_Loader)
+    if not isinstance(data, dict):
+        raise ValueError(f"YAML root must be a mapping: {path}")
+
+    _cache[key] = data
+    if len(_cache) > _CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+    return copy.deepcopy(data)
@@ -4,49 +4,129 @@ import json
 import sys
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-import yaml
+
+from _arrow_csv import NA_VALUES, pa, pac, pc
+from _yaml_cache import load_yaml
 
 
 METOCEAN_REQUIRED = ["valid_time", "10米风速", "有义波高", "峰值波周期"]
 CURRENT_REQUIRED = ["index", "流速 （节）", "流向 - 去向"]
-
-
-def _load_yaml(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-    if not isinstance(data, dict):
-        raise ValueError(f"YAML root must be a mapping: {path}")
-    return data
+CHUNK_ROWS = 200_000
+ARROW_BLOCK_SIZE = 1 << 20
 
 
 def _missing_columns(df: pd.DataFrame, required: list[str]) -> list[str]:
-    return [col for col in required if col not in df.columns]
-
-
-def _numeric_stats(df: pd.DataFrame, columns: list[str]) -> dict:
-    out = {}
-    for col in columns:
-        raw = df[col]
-        raw_na = raw.isna()
-        numeric = pd.to_numeric(raw, errors="coerce")
-        non_numeric_count = int((~raw_na & numeric.isna()).sum())
-        out[col] = {
-            "na_count": int(raw_na.sum()),
-            "na_rate": float(raw_na.mean()),
-            "non_numeric_count": non_numeric_count,
-            "min": (None if numeric.dropna().empty else float(numeric.min())),
-            "max": (None if numeric.dropna().empty else float(numeric.max())),
+    have = set(df.columns)
+    return [col for col in required if col not in have]
+
+
+def _format_stats(columns, rows, na_counts, non_numeric, mins, maxs) -> dict:
+    return {
+        col: {
+            "na_count": int(na_count),
+            "na_rate": (float(na_count / rows) if rows else float("nan")),
+            "non_numeric_count": int(non_numeric_count),
+            "min": (None if np.isnan(col_min) else float(col_min)),
+            "max": (None if np.isnan(col_max) else float(col_max)),
         }
-    return out
+        for col, na_count, non_numeric_count, col_min, col_max in zip(
+            columns, na_counts, non_numeric, mins, maxs
+        )
+    }
 
 
-def _read_csv(path: Path, nrows: int | None) -> pd.DataFrame:
-    return pd.read_csv(path, encoding="utf-8-sig", nrows=nrows)
+def _numeric_stats(chunks, columns: list[str]) -> tuple[int, dict]:
+    n_cols = len(columns)
+    rows = 0
+    na_counts = np.zeros(n_cols, dtype=np.int64)
+    non_numeric = np.zeros(n_cols, dtype=np.int64)
+    mins = np.full(n_cols, np.nan)
+    maxs = np.full(n_cols, np.nan)
+    for chunk in chunks:
+        sub = chunk[columns]
+        raw_na = sub.isna()
+        num = sub.apply(pd.to_numeric, errors="coerce")
+        rows += len(sub)
+        na_counts += raw_na.sum().to_numpy()
+        non_numeric += ((~raw_na) & num.isna()).sum().to_numpy()
+        mins = np.fmin(mins, num.min(skipna=True).to_numpy(dtype=np.float64))
+        maxs = np.fmax(maxs, num.max(skipna=True).to_numpy(dtype=np.float64))
+    return rows, _format_stats(columns, rows, na_counts, non_numeric, mins, maxs)
+
+
+def _arrow_numeric_stats(path: Path, columns: list[str], nrows: int | None) -> tuple[int, dict]:
+    reader = pac.open_csv(
+        path,
+        read_options=pac.ReadOptions(use_threads=True, block_size=ARROW_BLOCK_SIZE),
+        convert_options=pac.ConvertOptions(
+            include_columns=columns,
+            null_values=NA_VALUES,
+            strings_can_be_null=True,
+        ),
+    )
+    n_cols = len(columns)
+    rows = 0
+    na_counts = np.zeros(n_cols, dtype=np.int64)
+    non_numeric = np.zeros(n_cols, dtype=np.int64)
+    mins = np.full(n_cols, np.nan)
+    maxs = np.full(n_cols, np.nan)
+    for batch in reader:
+        if nrows is not None:
+            batch = batch.slice(0, nrows - rows)
+        rows += batch.num_rows
+        for i, col in enumerate(columns):
+            arr = batch.column(col)
+            na_counts[i] += arr.null_count
+            if pa.types.is_integer(arr.type) or pa.types.is_floating(arr.type):
+                if pa.types.is_floating(arr.type):
+                    # Arrow parses spellings such as "NAN" or "+nan" as NaN,
+                    # pandas keeps them as text that is not numeric.
+                    non_numeric[i] += pc.sum(pc.is_nan(arr)).as_py() or 0
+                min_max = pc.min_max(arr)
+                col_min, col_max = min_max["min"].as_py(), min_max["max"].as_py()
+            else:
+                # Columns Arrow could not infer as numeric hold text values.
+                raw = arr.to_pandas()
+                num = pd.to_numeric(raw, errors="coerce")
+                non_numeric[i] += int((raw.notna() & num.isna()).sum())
+                col_min, col_max = num.min(skipna=True), num.max(skipna=True)
+            if col_min is not None:
+                mins[i] = np.fmin(mins[i], col_min)
+                maxs[i] = np.fmax(maxs[i], col_max)
+        if nrows is not None and rows >= nrows:
+            break
+    return rows, _format_stats(columns, rows, na_counts, non_numeric, mins, maxs)
+
+
+def _read_header(path: Path) -> pd.DataFrame:
+    return pd.read_csv(path, encoding="utf-8-sig", nrows=0)
+
+
+def _read_chunks(path: Path, columns: list[str], nrows: int | None):
+    return pd.read_csv(
+        path,
+        encoding="utf-8-sig",
+        usecols=columns,
+        nrows=nrows,
+        chunksize=CHUNK_ROWS,
+    )
+
+
+def _column_stats(path: Path, columns: list[str], nrows: int | None) -> tuple[int, dict]:
+    if pa is not None:
+        try:
+            return _arrow_numeric_stats(path, columns, nrows)
+        except pa.ArrowInvalid:
+            # Arrow infers column types from the first block; a later block
+            # that does not fit is re-read with pandas' per-value coercion.
+            pass
+    return _numeric_stats(_read_chunks(path, columns, nrows), columns)
 
 
 def run(paths_file: Path, mode: str) -> tuple[dict, int]:
-    cfg = _load_yaml(paths_file)
+    cfg = load_yaml(paths_file)
     metocean_path = Path(cfg["metocean_csv"])
     current_path = Path(cfg["current_csv"])
 
@@ -64,11 +144,11 @@ def run(paths_file: Path, mode: str) -> tuple[dict, int]:
         }, 1
 
     nrows = 5000 if mode == "quick" else None
-    metocean_df = _read_csv(metocean_path, nrows=nrows)
-    current_df = _read_csv(current_path, nrows=nrows)
+    metocean_header = _read_header(metocean_path)
+    current_header = _read_header(current_path)
 
-    metocean_missing = _missing_columns(metocean_df, METOCEAN_REQUIRED)
-    current_missing = _missing_columns(current_df, CURRENT_REQUIRED)
+    metocean_missing = _missing_columns(metocean_header, METOCEAN_REQUIRED)
+    current_missing = _missing_columns(current_header, CURRENT_REQUIRED)
     if metocean_missing or current_missing:
         return {
             "success": False,
@@ -83,21 +163,24 @@ def run(paths_file: Path, mode: str) -> tuple[dict, int]:
     metocean_numeric_cols = [c for c in METOCEAN_REQUIRED if c != "valid_time"]
     current_numeric_cols = [c for c in CURRENT_REQUIRED if c != "index"]
 
+    metocean_rows, metocean_stats = _column_stats(metocean_path, metocean_numeric_cols, nrows)
+    current_rows, current_stats = _column_stats(current_path, current_numeric_cols, nrows)
+
     payload = {
         "success": True,
         "mode": mode,
         "paths": {"metocean_csv": str(metocean_path), "current_csv": str(current_path)},
         "metocean": {
-            "rows_read": int(len(metocean_df)),
-            "columns": list(metocean_df.columns),
+            "rows_read": int(metocean_rows),
+            "columns": list(metocean_header.columns),
             "required_columns_ok": True,
-            "numeric_stats": _numeric_stats(metocean_df, metocean_numeric_cols),
+            "numeric_stats": metocean_stats,
         },
         "current": {
-            "rows_read": int(len(current_df)),
-            "columns": list(current_df.columns),
+            "rows_read": int(current_rows),
+            "columns": list(current_header.columns),
             "required_columns_ok": True,
-            "numeric_stats": _numeric_stats(current_df, current_numeric_cols),
+            "numeric_stats": current_stats,
         },
     }
     return payload, 0
@@ -7,15 +7,7 @@ import platform
 import sys
 from pathlib import Path
 
-import yaml
-
-
-def _load_yaml(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-    if not isinstance(data, dict):
-        raise ValueError(f"YAML root must be a mapping: {path}")
-    return data
+from _yaml_cache import load_yaml
 
 
 def _check_imports(module_names: list[str]) -> tuple[dict, dict]:
@@ -31,7 +23,7 @@ def _check_imports(module_names: list[str]) -> tuple[dict, dict]:
 
 
 def run(paths_file: Path) -> tuple[dict, int]:
-    config = _load_yaml(paths_file)
+    config = load_yaml(paths_file)
     repo_root = Path(config["repo_root"]).resolve()
 
     module_names = ["virocon", "numpy", "pandas", "scipy", "sklearn", "matplotlib", "yaml"]
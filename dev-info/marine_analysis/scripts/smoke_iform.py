@@ -1,33 +1,59 @@
 #!/usr/bin/env python3
 import argparse
+import hashlib
 import json
+import os
+import pickle
 import sys
+import tempfile
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import yaml
-from virocon import (
-    DependenceFunction,
-    GlobalHierarchicalModel,
-    IFORMContour,
-    LogNormalDistribution,
-    WeibullDistribution,
-    WidthOfIntervalSlicer,
-    calculate_alpha,
-)
-
-
-def _load_yaml(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-    if not isinstance(data, dict):
-        raise ValueError(f"YAML root must be a mapping: {path}")
-    return data
+
+from _yaml_cache import load_yaml
+
+# matplotlib, pyarrow and virocon are imported where they are used so that argument
+# errors and --help do not pay their import cost.
+if TYPE_CHECKING:
+    from virocon import GlobalHierarchicalModel
+
+
+def _read_float_columns(csv_path: Path, columns: list[str]) -> tuple[list[np.ndarray], int]:
+    from _arrow_csv import NA_VALUES, pa, pac
+
+    if pa is not None:
+        convert_options = pac.ConvertOptions(
+            include_columns=columns,
+            column_types={col: pa.float64() for col in columns},
+            null_values=NA_VALUES,
+            strings_can_be_null=True,
+        )
+        try:
+            table = pac.read_csv(
+                csv_path,
+                read_options=pac.ReadOptions(use_threads=True),
+                convert_options=convert_options,
+            )
+        except pa.ArrowInvalid:
+            # Text values that are not null markers; let pandas coerce them.
+            pass
+        else:
+            # Nulls come back as NaN for float columns.
+            arrays = [table.column(col).to_numpy() for col in columns]
+            return arrays, table.num_rows
+
+    raw_df = pd.read_csv(csv_path, encoding="utf-8-sig", usecols=columns)
+    raw_rows = len(raw_df)
+    arrays = []
+    for col in columns:
+        values = raw_df[col].to_numpy(copy=False)
+        if values.dtype.kind not in "fiu":
+            values = pd.to_numeric(values, errors="coerce")
+        arrays.append(np.asarray(values, dtype=np.float64))
+    del raw_df
+    return arrays, raw_rows
 
 
 def _prepare_data(
@@ -37,35 +63,47 @@ def _prepare_data(
     max_rows: int,
     random_seed: int,
 ) -> tuple[pd.DataFrame, int]:
-    raw_df = pd.read_csv(csv_path, encoding="utf-8-sig", usecols=[primary_var, secondary_var])
-    raw_rows = len(raw_df)
-    clean_df = raw_df.copy()
-    clean_df[primary_var] = pd.to_numeric(clean_df[primary_var], errors="coerce")
-    clean_df[secondary_var] = pd.to_numeric(clean_df[secondary_var], errors="coerce")
-    clean_df = clean_df.dropna(subset=[primary_var, secondary_var])
-    clean_df = clean_df[(clean_df[primary_var] > 0) & (clean_df[secondary_var] > 0)]
+    (a, b), raw_rows = _read_float_columns(csv_path, [primary_var, secondary_var])
+    mask = (a > 0) & (b > 0)
+    a = a[mask]
+    b = b[mask]
+
+    if len(a) > max_rows:
+        rng = np.random.default_rng(random_seed)
+        idx = rng.choice(len(a), size=max_rows, replace=False)
+        a = a[idx]
+        b = b[idx]
+
+    if len(a) == 0:
+        raise ValueError("No valid samples remain after preprocessing.")
 
-    if len(clean_df) > max_rows:
-        clean_df = clean_df.sample(n=max_rows, random_state=random_seed)
+    return pd.DataFrame({primary_var: a, secondary_var: b}), raw_rows
 
-    if clean_df.empty:
-        raise ValueError("No valid samples remain after preprocessing.")
 
-    return clean_df.reset_index(drop=True), raw_rows
+# The dependence functions only see interval-sized arrays (tens of values)
+# during the fit, where np.where is cheaper than in-place out=/where= ufuncs.
+def _power3(x, a, b, c):
+    x_pos = np.where(x >= 0, x, np.nan)
+    return a + b * x_pos**c
 
 
-def _build_model() -> GlobalHierarchicalModel:
-    def power3(x, a, b, c):
-        x_pos = np.where(x >= 0, x, np.nan)
-        return a + b * x_pos**c
+def _exp3(x, a, b, c):
+    x_pos = np.where(x >= 0, x, np.nan)
+    return a + b * np.exp(c * x_pos)
 
-    def exp3(x, a, b, c):
-        x_pos = np.where(x >= 0, x, np.nan)
-        return a + b * np.exp(c * x_pos)
+
+def _build_model() -> "GlobalHierarchicalModel":
+    from virocon import (
+        DependenceFunction,
+        GlobalHierarchicalModel,
+        LogNormalDistribution,
+        WeibullDistribution,
+        WidthOfIntervalSlicer,
+    )
 
     bounds = [(0, None), (0, None), (None, None)]
-    power_dep = DependenceFunction(power3, bounds)
-    exp_dep = DependenceFunction(exp3, bounds)
+    power_dep = DependenceFunction(_power3, bounds)
+    exp_dep = DependenceFunction(_exp3, bounds)
 
     dist_description_0 = {
         "distribution": WeibullDistribution(),
@@ -86,18 +124,28 @@ def _plot_contour(
     secondary_var: str,
     out_path: Path,
 ) -> None:
-    plot_df = sample_df
-    if len(plot_df) > 5000:
-        plot_df = plot_df.sample(n=5000, random_state=42)
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    xs = sample_df[primary_var].to_numpy()
+    ys = sample_df[secondary_var].to_numpy()
+    if len(xs) > 5000:
+        rng = np.random.default_rng(42)
+        idx = rng.choice(len(xs), size=5000, replace=False)
+        xs = xs[idx]
+        ys = ys[idx]
 
     fig, ax = plt.subplots(figsize=(8, 6))
     ax.scatter(
-        plot_df[primary_var].to_numpy(),
-        plot_df[secondary_var].to_numpy(),
+        xs,
+        ys,
         s=6,
         alpha=0.2,
         color="#4c78a8",
         label="sample",
+        rasterized=True,
     )
     ax.plot(
         coordinates[:, 0],
@@ -115,9 +163,59 @@ def _plot_contour(
     plt.close(fig)
 
 
-def run(paths_file: Path, runtime_file: Path) -> tuple[dict, int]:
-    paths_cfg = _load_yaml(paths_file)
-    runtime_cfg = _load_yaml(runtime_file)
+# Bump when _build_model, the dependence functions or the cached entry
+# layout change, so existing cache files are no longer matched.
+_FIT_CACHE_VERSION = 1
+
+
+def _fit_cache_path(cache_dir: Path, csv_path: Path, csv_stat: os.stat_result, *params) -> Path:
+    from virocon import __version__ as virocon_version
+
+    key = (
+        _FIT_CACHE_VERSION,
+        virocon_version,
+        str(csv_path.resolve()),
+        csv_stat.st_mtime_ns,
+        csv_stat.st_size,
+        *params,
+    )
+    digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+    return cache_dir / f"{digest}.pkl"
+
+
+def _load_fit_cache(cache_path: Path, csv_stat: os.stat_result) -> np.ndarray | None:
+    try:
+        with cache_path.open("rb") as f:
+            entry = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, AttributeError, EOFError):
+        return None
+    if (entry.get("csv_mtime_ns"), entry.get("csv_size")) != (
+        csv_stat.st_mtime_ns,
+        csv_stat.st_size,
+    ):
+        return None
+    return entry["coordinates"]
+
+
+def _save_fit_cache(cache_path: Path, csv_stat: os.stat_result, coordinates: np.ndarray) -> None:
+    entry = {
+        "csv_mtime_ns": csv_stat.st_mtime_ns,
+        "csv_size": csv_stat.st_size,
+        "coordinates": coordinates,
+    }
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    # A unique temporary file per writer, so concurrent runs with the same
+    # key do not write into each other's file before the atomic rename.
+    with tempfile.NamedTemporaryFile(dir=cache_path.parent, suffix=".tmp", delete=False) as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f.name, cache_path)
+
+
+def run(paths_file: Path, runtime_file: Path, use_cache: bool = False) -> tuple[dict, int]:
+    from virocon import IFORMContour, calculate_alpha
+
+    paths_cfg = load_yaml(paths_file)
+    runtime_cfg = load_yaml(runtime_file)
 
     metocean_csv = Path(paths_cfg["metocean_csv"])
     output_dir = Path(paths_cfg["output_dir"])
@@ -133,15 +231,35 @@ def run(paths_file: Path, runtime_file: Path) -> tuple[dict, int]:
     sample_df, raw_rows = _prepare_data(
         metocean_csv, primary_var, secondary_var, max_rows, random_seed
     )
-    data_2d = sample_df[[primary_var, secondary_var]].to_numpy()
-
-    model = _build_model()
-    model.fit(data_2d)
 
     # Smoke test uses a fixed 50-year contour target by plan.
     alpha = calculate_alpha(state_duration_hours, 50)
-    contour = IFORMContour(model, alpha, n_points=n_points)
-    coordinates = contour.coordinates
+
+    # The cache key does not cover edits to the in-repo virocon sources, so
+    # a cached run would not exercise them. Caching is therefore opt-in.
+    coordinates = None
+    if use_cache:
+        csv_stat = metocean_csv.stat()
+        cache_path = _fit_cache_path(
+            output_dir / ".cache",
+            metocean_csv,
+            csv_stat,
+            primary_var,
+            secondary_var,
+            max_rows,
+            random_seed,
+            n_points,
+            state_duration_hours,
+        )
+        coordinates = _load_fit_cache(cache_path, csv_stat)
+    if coordinates is None:
+        data_2d = sample_df[[primary_var, secondary_var]].to_numpy()
+        model = _build_model()
+        model.fit(data_2d)
+        contour = IFORMContour(model, alpha, n_points=n_points)
+        coordinates = contour.coordinates
+        if use_cache:
+            _save_fit_cache(cache_path, csv_stat, coordinates)
 
     coords_csv = output_dir / "iform_wind10_hs_coords.csv"
     plot_png = output_dir / "iform_wind10_hs_plot.png"
@@ -173,10 +291,15 @@ def main() -> int:
     parser = argparse.ArgumentParser(description="Run minimal IFORM smoke test on marine data.")
     parser.add_argument("--paths", required=True, help="Path to paths.yaml")
     parser.add_argument("--runtime", required=True, help="Path to runtime.yaml")
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse the contour of an earlier run with the same data and settings",
+    )
     args = parser.parse_args()
 
     try:
-        payload, exit_code = run(Path(args.paths), Path(args.runtime))
+        payload, exit_code = run(Path(args.paths), Path(args.runtime), use_cache=args.cache)
     except Exception as exc:  # pragma: no cover - explicit error path
         payload = {"success": False, "error": f"{type(exc).__name__}: {exc}"}
         exit_code = 1
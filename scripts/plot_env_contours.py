@@ -4,6 +4,8 @@
 使用 ViroCon 库基于 MarineDataGroupLimited 数据计算环境等值线
 """
 
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -15,32 +17,22 @@ from virocon import (
     IFORMContour,
     calculate_alpha,
     WidthOfIntervalSlicer,
+    get_DNVGL_Hs_U,
 )
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei', 'DejaVu Sans']
 plt.rcParams['axes.unicode_minus'] = False
 
-# =============================================================================
-# 1. 读取数据
-# =============================================================================
-data_path = "../data/Data-MarineDataGroupLimited/metocean_result.csv"
-df = pd.read_csv(data_path, encoding='utf-8')
-
-print(f"数据行数: {len(df)}")
-print(f"数据列: {df.columns.tolist()}")
-
-# 清理数据：移除 NaN 和非正值
-df_clean = df[['有义波高', '峰值波周期', '10米风速']].dropna()
-df_clean = df_clean[(df_clean['有义波高'] > 0) &
-                    (df_clean['峰值波周期'] > 0) &
-                    (df_clean['10米风速'] > 0)]
-
-print(f"\n清理后数据行数: {len(df_clean)}")
-print(df_clean.describe())
+DATA_PATH = "../data/Data-MarineDataGroupLimited/metocean_result.csv"
+STATE_DURATION = 1  # 小时
+RETURN_PERIODS = [10, 50, 100]  # 年
+# calculate_alpha 的重现期单位为年（内部换算为小时），且支持数组输入
+ALPHAS = calculate_alpha(STATE_DURATION, np.array(RETURN_PERIODS))
+COLORS = ['blue', 'green', 'red']
 
 # =============================================================================
-# 2. 定义联合分布模型 (Hs - Tp) - 使用 DNVGL 标准模型结构
+# 联合分布模型定义
 # =============================================================================
 
 def _power3(x, a, b, c):
@@ -49,135 +41,151 @@ def _power3(x, a, b, c):
 def _exp3(x, a, b, c):
     return a + b * np.exp(c * x)
 
-# 正确的 bounds 格式：每个参数一个 (lower, upper) 元组
-bounds = [(0, None), (0, None), (None, None)]
-
-power3 = DependenceFunction(_power3, bounds)
-exp3 = DependenceFunction(_exp3, bounds)
-
-dist_descriptions_hs_tp = [
+def _hs_tp_descriptions():
+    """Hs - Tp 模型，使用 DNVGL 标准模型结构。"""
+    # TODO: 100 年重现期 Hs 约 8.07 m，低于实测最大 Hs（约 11.8 m），
+    # 该模型可能低估了 Hs 上尾，需要重新评估模型选择。
+    # 正确的 bounds 格式：每个参数一个 (lower, upper) 元组
+    bounds = [(0, None), (0, None), (None, None)]
+
+    power3 = DependenceFunction(_power3, bounds)
+    exp3 = DependenceFunction(_exp3, bounds)
+
+    dist_descriptions = [
+        {
+            "distribution": WeibullDistribution(),
+            "intervals": WidthOfIntervalSlicer(width=0.5),
+        },
+        {
+            "distribution": LogNormalDistribution(),
+            "conditional_on": 0,
+            "parameters": {"mu": power3, "sigma": exp3},
+        },
+    ]
+    return dist_descriptions, None
+
+def _u10_hs_descriptions():
+    """风速-波高模型，使用 DNVGL Hs-U 模型结构。"""
+    # 注意：DNVGL 模型是 U-Hs，我们需要调整为 U10-Hs（风速-波高）
+    # 直接使用拟合数据
+    dist_descriptions, fit_descriptions, _ = get_DNVGL_Hs_U()
+    return dist_descriptions, fit_descriptions
+
+# 每组变量：拟合列顺序、绘图时的 (x, y) 列索引、坐标轴标签和输出文件
+PAIRS = [
     {
-        "distribution": WeibullDistribution(),
-        "intervals": WidthOfIntervalSlicer(width=0.5),
+        "name": "Hs-Tp",
+        "columns": ['有义波高', '峰值波周期'],
+        "descriptions": _hs_tp_descriptions,
+        "plot_xy": (1, 0),
+        "xlabel": '峰值波周期 Tp (s)',
+        "ylabel": '有义波高 Hs (m)',
+        "title": '海洋环境等值线 (Tp-Hs)',
+        "scatter_alpha": 0.3,
+        "out_png": '../output/env_contours_Tp_Hs.png',
     },
     {
-        "distribution": LogNormalDistribution(),
-        "conditional_on": 0,
-        "parameters": {"mu": power3, "sigma": exp3},
+        "name": "U10-Hs",
+        "columns": ['10米风速', '有义波高'],
+        "descriptions": _u10_hs_descriptions,
+        "plot_xy": (0, 1),
+        "xlabel": '10米风速 U10 (m/s)',
+        "ylabel": '有义波高 Hs (m)',
+        "title": '海洋环境等值线 (U10-Hs)',
+        "scatter_alpha": 0.1,
+        "out_png": '../output/env_contours_U10_Hs.png',
     },
 ]
 
 # =============================================================================
-# 3. 拟合模型
-# =============================================================================
-print("\n正在拟合 Hs-Tp 模型...")
-
-model_hs_tp = GlobalHierarchicalModel(dist_descriptions_hs_tp)
-data_hs_tp = df_clean[['有义波高', '峰值波周期']].values
-model_hs_tp.fit(data_hs_tp)
-
-print("Hs-Tp 模型拟合完成")
-print(f"Hs (Weibull) 参数: alpha={model_hs_tp.distributions[0].alpha:.3f}, "
-      f"beta={model_hs_tp.distributions[0].beta:.3f}, "
-      f"gamma={model_hs_tp.distributions[0].gamma:.3f}")
-
-# =============================================================================
-# 4. 计算环境等值线
-# =============================================================================
-state_duration = 1  # 小时
-return_periods = [10, 50, 100]  # 年
-hours_per_year = 365.25 * 24
-
-contours = {}
-for rp in return_periods:
-    alpha = calculate_alpha(state_duration, rp * hours_per_year)
-    contour = IFORMContour(model_hs_tp, alpha)
-    contours[rp] = contour
-    print(f"{rp}年重现期: alpha = {alpha:.2e}")
-
-# =============================================================================
-# 5. 绘制等值线
+# 拟合模型、计算并绘制环境等值线
 # =============================================================================
-fig, ax = plt.subplots(figsize=(10, 8))
-
-ax.scatter(df_clean['峰值波周期'], df_clean['有义波高'],
-           s=1, alpha=0.3, c='gray', label='观测数据')
-
-colors = ['blue', 'green', 'red']
-for (rp, contour), color in zip(contours.items(), colors):
-    coords = contour.coordinates
-    ax.plot(coords[:, 1], coords[:, 0], color=color, linewidth=2,
-            label=f'{rp}年重现期')
-
-ax.set_xlabel('峰值波周期 Tp (s)', fontsize=12)
-ax.set_ylabel('有义波高 Hs (m)', fontsize=12)
-ax.set_title('海洋环境等值线 (Tp-Hs)', fontsize=14)
-ax.legend()
-ax.grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('../output/env_contours_Tp_Hs.png', dpi=150, bbox_inches='tight')
-print("\n等值线图已保存至 output/env_contours_Hs_Tp.png")
-
-# =============================================================================
-# 6. 风速-波高模型 (使用 DNVGL Hs-U 模型结构)
-# =============================================================================
-print("\n正在拟合风速-波高模型...")
-
-# 使用 DNVGL 预定义模型结构
-from virocon import get_DNVGL_Hs_U
-
-dist_descriptions_u10_hs, fit_descriptions_u10_hs, _ = get_DNVGL_Hs_U()
-
-# 注意：DNVGL 模型是 U-Hs，我们需要调整为 U10-Hs（风速-波高）
-# 直接使用拟合数据
-model_u10_hs = GlobalHierarchicalModel(dist_descriptions_u10_hs)
-data_u10_hs = df_clean[['10米风速', '有义波高']].values
-model_u10_hs.fit(data_u10_hs, fit_descriptions=fit_descriptions_u10_hs)
-
-print("风速-波高模型拟合完成")
-
-contours_u10_hs = {}
-for rp in return_periods:
-    alpha = calculate_alpha(state_duration, rp * hours_per_year)
-    contour = IFORMContour(model_u10_hs, alpha)
-    contours_u10_hs[rp] = contour
-
-fig, ax = plt.subplots(figsize=(10, 8))
-
-ax.scatter(df_clean['10米风速'], df_clean['有义波高'],
-           s=1, alpha=0.1, c='gray', label='观测数据')
-
-for (rp, contour), color in zip(contours_u10_hs.items(), colors):
-    coords = contour.coordinates
-    ax.plot(coords[:, 0], coords[:, 1], color=color, linewidth=2,
-            label=f'{rp}年重现期')
-
-ax.set_xlabel('10米风速 U10 (m/s)', fontsize=12)
-ax.set_ylabel('有义波高 Hs (m)', fontsize=12)
-ax.set_title('海洋环境等值线 (U10-Hs)', fontsize=14)
-ax.legend()
-ax.grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('../output/env_contours_U10_Hs.png', dpi=150, bbox_inches='tight')
-print("\n风速-波高等值线图已保存至 output/env_contours_U10_Hs.png")
-
-# =============================================================================
-# 7. 输出等值线坐标
-# =============================================================================
-print("\n" + "="*60)
-print("等值线坐标数据 (Hs-Tp)")
-print("="*60)
-
-for rp in return_periods:
-    coords = contours[rp].coordinates
-    print(f"\n{rp}年重现期等值线 (共 {len(coords)} 个点):")
-    print(f"  Hs 最大值: {coords[:, 0].max():.2f} m")
-    print(f"  Tp 最大值: {coords[:, 1].max():.2f} s")
-
-    coord_df = pd.DataFrame(coords, columns=['Hs_m', 'Tp_s'])
-    coord_df.to_csv(f'../output/contour_{rp}yr_Hs_Tp.csv', index=False)
-    print(f"  已保存至 output/contour_{rp}yr_Hs_Tp.csv")
 
-print("\n完成!")
+def _run_pair(pair, data):
+    """拟合一组变量的模型，计算各重现期等值线并保存图片，返回等值线坐标。"""
+    dist_descriptions, fit_descriptions = pair["descriptions"]()
+    model = GlobalHierarchicalModel(dist_descriptions)
+    model.fit(data, fit_descriptions=fit_descriptions)
+
+    weibull = model.distributions[0]
+    print(f"{pair['name']} 模型拟合完成")
+    print(f"{pair['name']} 第一变量 (Weibull) 参数: alpha={weibull.alpha:.3f}, "
+          f"beta={weibull.beta:.3f}, gamma={weibull.gamma:.3f}")
+
+    coordinates = {}
+    for rp, alpha in zip(RETURN_PERIODS, ALPHAS):
+        coordinates[rp] = IFORMContour(model, alpha).coordinates
+        print(f"{pair['name']} {rp}年重现期: alpha = {alpha:.2e}")
+
+    ix, iy = pair["plot_xy"]
+    fig, ax = plt.subplots(figsize=(10, 8))
+
+    ax.scatter(data[:, ix], data[:, iy],
+               s=1, alpha=pair["scatter_alpha"], c='gray', label='观测数据',
+               rasterized=True)
+
+    for (rp, coords), color in zip(coordinates.items(), COLORS):
+        ax.plot(coords[:, ix], coords[:, iy], color=color, linewidth=2,
+                label=f'{rp}年重现期')
+
+    ax.set_xlabel(pair["xlabel"], fontsize=12)
+    ax.set_ylabel(pair["ylabel"], fontsize=12)
+    ax.set_title(pair["title"], fontsize=14)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    fig.tight_layout()
+    fig.savefig(pair["out_png"], dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    print(f"\n等值线图已保存至 {pair['out_png'].removeprefix('../')}")
+
+    return coordinates
+
+def main():
+    # =========================================================================
+    # 1. 读取数据
+    # =========================================================================
+    df = pd.read_csv(DATA_PATH, encoding='utf-8')
+
+    print(f"数据行数: {len(df)}")
+    print(f"数据列: {df.columns.tolist()}")
+
+    # 清理数据：移除 NaN 和非正值
+    df_clean = df[['有义波高', '峰值波周期', '10米风速']].dropna()
+    df_clean = df_clean[(df_clean['有义波高'] > 0) &
+                        (df_clean['峰值波周期'] > 0) &
+                        (df_clean['10米风速'] > 0)]
+
+    print(f"\n清理后数据行数: {len(df_clean)}")
+    print(df_clean.describe())
+
+    # =========================================================================
+    # 2. 拟合模型并绘制等值线（两组模型相互独立，并行计算）
+    # =========================================================================
+    print("\n正在拟合 Hs-Tp 与风速-波高模型...")
+    datas = [df_clean[pair["columns"]].to_numpy() for pair in PAIRS]
+    with ProcessPoolExecutor(max_workers=len(PAIRS)) as ex:
+        results = list(ex.map(_run_pair, PAIRS, datas))
+    contours_hs_tp = results[0]
+
+    # =========================================================================
+    # 3. 输出等值线坐标
+    # =========================================================================
+    print("\n" + "="*60)
+    print("等值线坐标数据 (Hs-Tp)")
+    print("="*60)
+
+    for rp in RETURN_PERIODS:
+        coords = contours_hs_tp[rp]
+        print(f"\n{rp}年重现期等值线 (共 {len(coords)} 个点):")
+        print(f"  Hs 最大值: {coords[:, 0].max():.2f} m")
+        print(f"  Tp 最大值: {coords[:, 1].max():.2f} s")
+
+        coord_df = pd.DataFrame(coords, columns=['Hs_m', 'Tp_s'])
+        coord_df.to_csv(f'../output/contour_{rp}yr_Hs_Tp.csv', index=False)
+        print(f"  已保存至 output/contour_{rp}yr_Hs_Tp.csv")
+
+    print("\n完成!")
+
+if __name__ == "__main__":
+    main()
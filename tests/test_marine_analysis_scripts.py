@@ -1,56 +1,288 @@
+import importlib
 import json
-import subprocess
+import os
 import sys
+from collections import OrderedDict
 from pathlib import Path
 
+import numpy as np
+import pytest
 
-REPO_ROOT = Path("/Users/lichao/codes/_github/virocon-dev")
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
 MARINE_ROOT = REPO_ROOT / "dev-info" / "marine_analysis"
 SCRIPTS_ROOT = MARINE_ROOT / "scripts"
 PATHS_YAML = MARINE_ROOT / "configs" / "paths.yaml"
 RUNTIME_YAML = MARINE_ROOT / "configs" / "runtime.yaml"
 
 
-def _run(script_name, *args):
-    cmd = [sys.executable, str(SCRIPTS_ROOT / script_name), *args]
-    return subprocess.run(cmd, capture_output=True, text=True, check=False)
+@pytest.fixture
+def import_script(monkeypatch):
+    # The scripts import their helpers as top-level modules, so the scripts
+    # folder is put on sys.path for the duration of each test only.
+    monkeypatch.syspath_prepend(str(SCRIPTS_ROOT))
+    return importlib.import_module
+
+
+def _run(monkeypatch, capsys, script, *args):
+    monkeypatch.setattr(sys, "argv", [script.__file__, *args])
+    exit_code = script.main()
+    captured = capsys.readouterr()
+    return exit_code, captured
 
 
 def _parse_json(stdout):
     return json.loads(stdout)
 
 
-def test_check_env_script():
-    result = _run("check_env.py", "--paths", str(PATHS_YAML))
-    assert result.returncode == 0, result.stdout + result.stderr
-    payload = _parse_json(result.stdout)
+def test_check_env_script(monkeypatch, capsys, import_script):
+    check_env = import_script("check_env")
+    exit_code, captured = _run(
+        monkeypatch, capsys, check_env, "--paths", str(PATHS_YAML)
+    )
+    assert exit_code == 0, captured.out + captured.err
+    payload = _parse_json(captured.out)
     assert payload["success"] is True
     assert "python_version" in payload
     assert "virocon_version" in payload
 
 
-def test_check_data_quick_script():
-    result = _run("check_data.py", "--paths", str(PATHS_YAML), "--quick")
-    assert result.returncode == 0, result.stdout + result.stderr
-    payload = _parse_json(result.stdout)
+def test_check_data_quick_script(monkeypatch, capsys, import_script):
+    check_data = import_script("check_data")
+    exit_code, captured = _run(
+        monkeypatch, capsys, check_data, "--paths", str(PATHS_YAML), "--quick"
+    )
+    assert exit_code == 0, captured.out + captured.err
+    payload = _parse_json(captured.out)
     assert payload["success"] is True
     assert payload["mode"] == "quick"
     assert "metocean" in payload
     assert "current" in payload
 
 
-def test_smoke_iform_script_outputs():
-    result = _run(
-        "smoke_iform.py",
+def test_smoke_iform_script_outputs(monkeypatch, capsys, import_script):
+    smoke_iform = import_script("smoke_iform")
+
+    # Without --cache the model must be fitted on every run.
+    def no_cache(*args, **kwargs):
+        raise AssertionError("the fit cache was used without --cache")
+
+    monkeypatch.setattr(smoke_iform, "_load_fit_cache", no_cache)
+    monkeypatch.setattr(smoke_iform, "_save_fit_cache", no_cache)
+    exit_code, captured = _run(
+        monkeypatch,
+        capsys,
+        smoke_iform,
         "--paths",
         str(PATHS_YAML),
         "--runtime",
         str(RUNTIME_YAML),
     )
-    assert result.returncode == 0, result.stdout + result.stderr
-    payload = _parse_json(result.stdout)
+    assert exit_code == 0, captured.out + captured.err
+    payload = _parse_json(captured.out)
     assert payload["success"] is True
     coords_path = Path(payload["output"]["coords_csv"])
     plot_path = Path(payload["output"]["plot_png"])
     assert coords_path.exists()
     assert plot_path.exists()
+
+
+@pytest.fixture
+def yaml_cache(monkeypatch, import_script):
+    module = import_script("_yaml_cache")
+    monkeypatch.setattr(module, "_cache", OrderedDict())
+    return module
+
+
+def _count_yaml_loads(monkeypatch, module):
+    calls = []
+    real_load = module.yaml.load
+
+    def counting_load(*args, **kwargs):
+        calls.append(1)
+        return real_load(*args, **kwargs)
+
+    monkeypatch.setattr(module.yaml, "load", counting_load)
+    return calls
+
+
+def test_load_yaml_cache_hit(tmp_path, monkeypatch, yaml_cache):
+    path = tmp_path / "config.yaml"
+    path.write_text("a: 1\nb: [1, 2]\n", encoding="utf-8")
+    calls = _count_yaml_loads(monkeypatch, yaml_cache)
+
+    first = yaml_cache.load_yaml(path)
+    second = yaml_cache.load_yaml(path)
+
+    assert first == second == {"a": 1, "b": [1, 2]}
+    assert len(calls) == 1
+
+
+def test_load_yaml_cache_evicts_least_recently_used(tmp_path, monkeypatch, yaml_cache):
+    paths = []
+    for i in range(yaml_cache._CACHE_MAX_ENTRIES + 1):
+        path = tmp_path / f"config_{i}.yaml"
+        path.write_text(f"index: {i}\n", encoding="utf-8")
+        paths.append(path)
+        yaml_cache.load_yaml(path)
+
+    assert len(yaml_cache._cache) == yaml_cache._CACHE_MAX_ENTRIES
+    cached_paths = {key[0] for key in yaml_cache._cache}
+    assert str(paths[0].resolve()) not in cached_paths
+    assert str(paths[-1].resolve()) in cached_paths
+
+    calls = _count_yaml_loads(monkeypatch, yaml_cache)
+    assert yaml_cache.load_yaml(paths[0]) == {"index": 0}
+    assert len(calls) == 1
+
+
+def test_load_yaml_cache_invalidated_by_rewrite(tmp_path, yaml_cache):
+    path = tmp_path / "config.yaml"
+    path.write_text("a: 1\n", encoding="utf-8")
+    assert yaml_cache.load_yaml(path) == {"a": 1}
+
+    st = path.stat()
+    path.write_text("a: 22\n", encoding="utf-8")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert yaml_cache.load_yaml(path) == {"a": 22}
+
+
+def test_load_yaml_cache_returns_copies(tmp_path, yaml_cache):
+    path = tmp_path / "config.yaml"
+    path.write_text("a: 1\nb: [1, 2]\n", encoding="utf-8")
+
+    first = yaml_cache.load_yaml(path)
+    first["a"] = 99
+    first["b"].append(3)
+
+    assert yaml_cache.load_yaml(path) == {"a": 1, "b": [1, 2]}
+
+
+def test_fit_cache_hit_and_invalidation(tmp_path, import_script):
+    smoke_iform = import_script("smoke_iform")
+    cache_dir = tmp_path / ".cache"
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("x,y\n1,2\n", encoding="utf-8")
+    params = ("x", "y", 100, 42, 180, 1.0)
+    csv_stat = csv_path.stat()
+    cache_path = smoke_iform._fit_cache_path(cache_dir, csv_path, csv_stat, *params)
+    coordinates = np.arange(6.0).reshape(3, 2)
+
+    assert smoke_iform._load_fit_cache(cache_path, csv_stat) is None
+    smoke_iform._save_fit_cache(cache_path, csv_stat, coordinates)
+    np.testing.assert_array_equal(
+        smoke_iform._load_fit_cache(cache_path, csv_stat), coordinates
+    )
+
+    # Any change of a fit parameter selects a different entry.
+    other_params = ("x", "y", 101, 42, 180, 1.0)
+    assert (
+        smoke_iform._fit_cache_path(cache_dir, csv_path, csv_stat, *other_params)
+        != cache_path
+    )
+
+    # Rewriting the CSV changes the key and fails the stored mtime/size check.
+    csv_path.write_text("x,y\n1,2\n3,4\n", encoding="utf-8")
+    os.utime(csv_path, ns=(csv_stat.st_atime_ns, csv_stat.st_mtime_ns + 1_000_000_000))
+    new_stat = csv_path.stat()
+    assert (
+        smoke_iform._fit_cache_path(cache_dir, csv_path, new_stat, *params)
+        != cache_path
+    )
+    assert smoke_iform._load_fit_cache(cache_path, new_stat) is None
+
+
+def test_fit_cache_ignores_unreadable_entries(tmp_path, import_script):
+    smoke_iform = import_script("smoke_iform")
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("x,y\n1,2\n", encoding="utf-8")
+    csv_stat = csv_path.stat()
+    cache_path = tmp_path / "corrupt.pkl"
+    cache_path.write_bytes(b"not a pickle")
+
+    assert smoke_iform._load_fit_cache(cache_path, csv_stat) is None
+
+
+DIRTY_CSVS = {
+    "na_markers": "a,b\nNA,N/A\nnan,null\n2,NaN\nNone,\n1,3.5\n",
+    "text": "a,b\nx,1.5\n2,abc\n,4\n3,-1\n",
+    "inf": "a,b\ninf,1\n-inf,x\n2,Infinity\n",
+    "nan_spellings": "a,b\nNAN,1\n1,nAn\n-NAN,2\n3,+nan\n",
+    "empty": "a,b\n",
+    "type_change": "a,b\n" + "1,2\n" * 40 + "x,2.5\nNA,3\n",
+}
+
+
+@pytest.fixture
+def check_data_small_blocks(monkeypatch, import_script):
+    check_data = import_script("check_data")
+    # Small blocks and chunks so the type change spans several of each.
+    monkeypatch.setattr(check_data, "ARROW_BLOCK_SIZE", 64)
+    monkeypatch.setattr(check_data, "CHUNK_ROWS", 7)
+    return check_data
+
+
+@pytest.mark.parametrize("nrows", [None, 3])
+@pytest.mark.parametrize("name", sorted(DIRTY_CSVS))
+def test_check_data_arrow_and_pandas_stats_agree(
+    tmp_path, check_data_small_blocks, name, nrows
+):
+    pytest.importorskip("pyarrow")
+    check_data = check_data_small_blocks
+    path = tmp_path / f"{name}.csv"
+    path.write_text(DIRTY_CSVS[name], encoding="utf-8")
+    columns = ["a", "b"]
+
+    pandas_stats = check_data._numeric_stats(
+        check_data._read_chunks(path, columns, nrows), columns
+    )
+    if name == "type_change":
+        with pytest.raises(check_data.pa.ArrowInvalid):
+            check_data._arrow_numeric_stats(path, columns, nrows=None)
+        arrow_stats = check_data._column_stats(path, columns, nrows)
+    else:
+        arrow_stats = check_data._arrow_numeric_stats(path, columns, nrows)
+
+    # json.dumps renders NaN consistently, plain == would not.
+    assert json.dumps(arrow_stats, sort_keys=True) == json.dumps(
+        pandas_stats, sort_keys=True
+    )
+
+
+def test_check_data_arrow_stats_use_pandas_na_values(tmp_path, import_script):
+    pytest.importorskip("pyarrow")
+    check_data = import_script("check_data")
+    path = tmp_path / "na_markers.csv"
+    path.write_text(DIRTY_CSVS["na_markers"], encoding="utf-8")
+
+    rows, stats = check_data._arrow_numeric_stats(path, ["a"], None)
+
+    assert rows == 5
+    assert stats["a"]["na_count"] == 3
+    assert stats["a"]["non_numeric_count"] == 0
+
+
+def test_smoke_iform_arrow_reader_accepts_pandas_na_values(
+    tmp_path, monkeypatch, import_script
+):
+    pytest.importorskip("pyarrow")
+    smoke_iform = import_script("smoke_iform")
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\nNaN,1\nN/A,2\nnull,3\n4,<NA>\n", encoding="utf-8")
+
+    def no_pandas_fallback(*args, **kwargs):
+        raise AssertionError("NA markers forced the pandas fallback")
+
+    monkeypatch.setattr(smoke_iform.pd, "read_csv", no_pandas_fallback)
+    (a, b), rows = smoke_iform._read_float_columns(path, ["a", "b"])
+
+    assert rows == 4
+    np.testing.assert_array_equal(a, [np.nan, np.nan, np.nan, 4.0])
+    np.testing.assert_array_equal(b, [1.0, 2.0, 3.0, np.nan])
+
+
+def test_arrow_na_values_match_pandas_defaults(import_script):
+    parsers = pytest.importorskip("pandas._libs.parsers")
+    arrow_csv = import_script("_arrow_csv")
+
+    assert arrow_csv.NA_VALUES == sorted(parsers.STR_NA_VALUES)